@@ -0,0 +1,228 @@
+"""Admission control for the API.
+
+Every HTTP request is sorted into a route class (expensive, auth, bulk,
+cheap). Each class has its own concurrency limit, queue limit and per-client
+token bucket. All classes also share a global concurrency limit, and queued
+requests get global slots in priority order. A request that can't get in
+quickly is rejected with 503 (overloaded) or 429 (rate limited) and a
+Retry-After header, so a burst of expensive work can't take every slot from
+the cheap endpoints.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from urllib.parse import parse_qs
+
+
+class RouteClass:
+    """Limits for one class of routes. Lower priority numbers are admitted first."""
+
+    def __init__(self, name, priority, max_concurrent, max_queue, queue_timeout, rate, burst):
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout  # seconds a request may wait for a slot
+        self.rate = rate  # tokens per second per client
+        self.burst = burst  # bucket size per client
+
+
+DEFAULT_ROUTE_CLASSES = [
+    RouteClass("cheap", priority=0, max_concurrent=32, max_queue=64, queue_timeout=2.0, rate=50, burst=100),
+    RouteClass("auth", priority=1, max_concurrent=4, max_queue=16, queue_timeout=2.0, rate=2, burst=10),
+    RouteClass("bulk", priority=2, max_concurrent=4, max_queue=8, queue_timeout=1.0, rate=5, burst=10),
+    RouteClass("expensive", priority=3, max_concurrent=2, max_queue=4, queue_timeout=1.0, rate=0.2, burst=3),
+]
+
+
+def classify(method: str, path: str, query_string: bytes) -> str:
+    """Returns the route class name for a request."""
+    if method == "POST" and path == "/compare_prices":
+        return "expensive"  # pandas + OpenAI call
+    if method == "POST" and path in ("/login", "/register"):
+        return "auth"  # bcrypt
+    if method == "GET" and (path == "/users/" or path.startswith("/dashboard/")):
+        return "bulk"  # full table read / several queries per request
+    if method == "GET" and path == "/products/":
+        search = parse_qs(query_string.decode("latin-1")).get("search", [""])[0]
+        if not search:
+            return "bulk"  # unfiltered full table scan
+    return "cheap"
+
+
+class _Gate:
+    """Concurrency limit with a bounded wait queue ordered by priority."""
+
+    def __init__(self, limit, max_queue):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @property
+    def queued(self):
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority, timeout) -> bool:
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return True
+        if self.queued >= self.max_queue:
+            return False
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(fut, timeout)
+            return True
+        except asyncio.TimeoutError:
+            # wait_for may time out after release() already handed us the slot
+            return fut.done() and not fut.cancelled()
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that was handed over meanwhile
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+class _TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now) -> float:
+        """Takes a token; returns 0 on success or the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Holds the limits, queues, buckets and counters shared by the middleware."""
+
+    def __init__(self, route_classes=None, global_limit=40, global_queue=100, max_buckets=10000):
+        self.route_classes = {rc.name: rc for rc in (route_classes or DEFAULT_ROUTE_CLASSES)}
+        self._gates = {name: _Gate(rc.max_concurrent, rc.max_queue) for name, rc in self.route_classes.items()}
+        self._global = _Gate(global_limit, global_queue)
+        self._buckets = {}
+        self.max_buckets = max_buckets
+        self.counters = {
+            name: {"admitted": 0, "rejected_overload": 0, "rejected_rate": 0}
+            for name in self.route_classes
+        }
+
+    def _check_rate(self, rc, client) -> float:
+        now = time.monotonic()
+        key = (rc.name, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = self._buckets[key] = _TokenBucket(rc.rate, rc.burst, now)
+        return bucket.take(now)
+
+    def _prune(self, now):
+        # Drop buckets that have refilled completely; they behave like new ones
+        for key, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self._buckets[key]
+
+    async def admit(self, class_name, client):
+        """Returns (admitted, status, retry_after). Call release() after an admitted request."""
+        rc = self.route_classes[class_name]
+        counters = self.counters[class_name]
+
+        wait = self._check_rate(rc, client)
+        if wait:
+            counters["rejected_rate"] += 1
+            return False, 429, math.ceil(wait)
+
+        deadline = time.monotonic() + rc.queue_timeout
+        gate = self._gates[class_name]
+        if not await gate.acquire(0, rc.queue_timeout):
+            counters["rejected_overload"] += 1
+            return False, 503, math.ceil(rc.queue_timeout)
+        try:
+            admitted = await self._global.acquire(rc.priority, max(0.0, deadline - time.monotonic()))
+        except BaseException:
+            # Cancelled while queued for a global slot; give back the class slot
+            gate.release()
+            raise
+        if not admitted:
+            gate.release()
+            counters["rejected_overload"] += 1
+            return False, 503, math.ceil(rc.queue_timeout)
+
+        counters["admitted"] += 1
+        return True, 200, 0
+
+    def release(self, class_name):
+        self._global.release()
+        self._gates[class_name].release()
+
+    def stats(self) -> dict:
+        """Current queue depth, in-flight requests and counters per route class."""
+        classes = {}
+        for name, gate in self._gates.items():
+            classes[name] = {"active": gate.active, "queued": gate.queued, **self.counters[name]}
+        return {
+            "global": {"active": self._global.active, "queued": self._global.queued},
+            "classes": classes,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that runs every HTTP request through an AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController, classify=classify):
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        class_name = self.classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        admitted, status, retry_after = await self.controller.admit(class_name, client)
+        if not admitted:
+            await self._reject(send, status, retry_after)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(class_name)
+
+    async def _reject(self, send, status, retry_after):
+        detail = "Too many requests" if status == 429 else "Server is busy, please retry"
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,82 @@
+"""Price-drop alert engine for watchlists.
+
+Watches are indexed by product, and each product keeps its watches sorted by
+target price. When ingestion changes a product's price, only that product's
+watches are looked at, and bisect finds the ones whose target price the new
+price has dropped to or below. A re-scrape costs O(changed products * log
+watches per product) instead of comparing every watch with every product.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+
+
+class AlertEngine:
+    def __init__(self):
+        # product_id -> sorted list of (target_price, watch_id, user_id)
+        self._by_product = defaultdict(list)
+        # watch_id -> (product_id, target_price, user_id), for removal
+        self._watches = {}
+
+    def __len__(self):
+        return len(self._watches)
+
+    def add_watch(self, watch_id: int, user_id: int, product_id: int, target_price: float):
+        if watch_id in self._watches:
+            self.remove_watch(watch_id)
+        target_price = float(target_price)
+        insort(self._by_product[product_id], (target_price, watch_id, user_id))
+        self._watches[watch_id] = (product_id, target_price, user_id)
+
+    def load_watches(self, rows):
+        """Bulk-loads (watch_id, user_id, product_id, target_price) rows, replacing the current index."""
+        self._by_product = defaultdict(list)
+        self._watches = {}
+        for watch_id, user_id, product_id, target_price in rows:
+            target_price = float(target_price)
+            self._by_product[product_id].append((target_price, watch_id, user_id))
+            self._watches[watch_id] = (product_id, target_price, user_id)
+        # Sorting each list once is much cheaper than insort per watch
+        for watches in self._by_product.values():
+            watches.sort()
+
+    def remove_watch(self, watch_id: int):
+        entry = self._watches.pop(watch_id, None)
+        if entry is None:
+            return
+        product_id, target_price, user_id = entry
+        watches = self._by_product[product_id]
+        i = bisect_left(watches, (target_price, watch_id, user_id))
+        if i < len(watches) and watches[i][1] == watch_id:
+            del watches[i]
+        if not watches:
+            del self._by_product[product_id]
+
+    def price_changed(self, product_id: int, old_price: float, new_price: float) -> list:
+        """Returns alerts for the watches on product_id that the price drop from old_price to new_price triggers.
+
+        A watch is triggered when the price drops to or below its target
+        price, and only if the old price was still above it. That way a watch
+        fires once per drop, not again on every scrape.
+        """
+        if new_price >= old_price:
+            return []
+        watches = self._by_product.get(product_id)
+        if not watches:
+            return []
+        # Targets in [new_price, old_price)
+        lo = bisect_left(watches, (new_price,))
+        hi = bisect_left(watches, (old_price,))
+        triggered_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return [
+            {
+                "user_id": user_id,
+                "watch_id": watch_id,
+                "product_id": product_id,
+                "target_price": target_price,
+                "old_price": old_price,
+                "new_price": new_price,
+                "created_at": triggered_at,
+            }
+            for target_price, watch_id, user_id in watches[lo:hi]
+        ]
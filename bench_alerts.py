@@ -0,0 +1,104 @@
+"""Benchmark: price-drop alerts during a full re-scrape.
+
+Times the whole ingestion path on a throwaway SQLite database: load the
+products, load the watchlist, then run upload_csv_data() on a re-scrape
+where every product's price changes (about half drop, half rise). That run
+includes reading the CSV, the batched price updates, alert evaluation and
+writing triggered alerts to the Alerts table. It also reports the in-memory
+AlertEngine time on its own.
+
+Usage:
+    python bench_alerts.py
+    python bench_alerts.py --products 100000 --watches 1000000
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+
+from alerts import AlertEngine
+
+
+def write_csv(path, prices):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["store_name", "product_name", "url", "price"])
+        for product_id, price in prices.items():
+            writer.writerow(["Target", f"Product {product_id}", f"https://www.example.com/p/{product_id}", f"${price:.2f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price-drop alert evaluation during ingestion")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--watches", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prices = {product_id: round(rng.uniform(1, 50), 2) for product_id in range(1, args.products + 1)}
+    new_prices = {product_id: round(price * rng.uniform(0.6, 1.4), 2) for product_id, price in prices.items()}
+    watches = []
+    for watch_id in range(1, args.watches + 1):
+        product_id = rng.randint(1, args.products)
+        target = round(prices[product_id] * rng.uniform(0.5, 1.0), 2)
+        watches.append((watch_id, 1731563859308 + rng.randint(1, args.users), product_id, target))
+
+    # In-memory engine only
+    engine = AlertEngine()
+    engine.load_watches(watches)
+    start = time.perf_counter()
+    triggered = sum(
+        len(engine.price_changed(product_id, old_price, new_prices[product_id]))
+        for product_id, old_price in prices.items()
+    )
+    engine_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(tmp, "bench.db")
+        first_scrape = os.path.join(tmp, "first.csv")
+        re_scrape = os.path.join(tmp, "rescrape.csv")
+        write_csv(first_scrape, prices)
+        write_csv(re_scrape, new_prices)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main as app
+
+            app.ensure_tables()
+            app.upload_csv_data([first_scrape])
+
+            # Products were inserted in CSV order into an empty table, so ids match
+            conn = app.create_connection()
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO Watchlist (watch_id, user_id, product_id, target_price, created_at) VALUES (%s, %s, %s, %s, %s)",
+                [watch + ("2024-11-21 00:00:00",) for watch in watches],
+            )
+            conn.commit()
+            conn.close()
+            app.load_watches()
+
+            start = time.perf_counter()
+            app.upload_csv_data([re_scrape])
+            ingest_s = time.perf_counter() - start
+
+            conn = app.create_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM Alerts")
+            alerts = cursor.fetchone()[0]
+            conn.close()
+
+    print(f"{args.products:,} products, {args.watches:,} watches, {triggered:,} alerts triggered")
+    print(f"alert engine only:               {engine_s:.2f} s")
+    print(f"upload_csv_data() re-scrape:     {ingest_s:.2f} s ({alerts:,} alerts written, SQLite)")
+    if alerts != triggered:
+        raise SystemExit(f"FAIL: expected {triggered} alerts in the database, found {alerts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: /dashboard/ latency vs loading its sections one after another.
+
+Uses a temporary SQLite database, with a fixed delay added to every query to
+stand in for the network round-trip to a remote MySQL server. Caching is
+turned off so every load hits the database.
+
+Usage:
+    python bench_dashboard.py
+    python bench_dashboard.py --rtt-ms 20 --runs 10
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from dashboard import Dashboard, SECTIONS
+from storage import SQLiteBackend
+
+
+class SlowBackend(SQLiteBackend):
+    """SQLite backend that sleeps before every query to simulate network latency."""
+
+    def __init__(self, path, rtt):
+        super().__init__(path)
+        self.rtt = rtt
+
+    def connect(self, pooled=False):
+        conn = super().connect(pooled)
+        cursor_factory = conn.cursor
+        rtt = self.rtt
+
+        def cursor(dictionary=False):
+            cursor = cursor_factory(dictionary)
+            execute = cursor.execute
+
+            def slow_execute(query, params=()):
+                time.sleep(rtt)
+                execute(query, params)
+
+            cursor.execute = slow_execute
+            return cursor
+
+        conn.cursor = cursor
+        return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard load latency")
+    parser.add_argument("--rtt-ms", type=float, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup = SQLiteBackend(path).connect()
+        cursor = setup.cursor()
+        SQLiteBackend(path).create_tables(cursor)
+        cursor.execute("INSERT INTO Users (user_id, name, email, dob, income, budget) VALUES (1, 'Bench', 'b@example.com', '1990-04-01', 55000, 1500)")
+        cursor.executemany(
+            "INSERT INTO Marketplace (store_name, product_name, url, price) VALUES (%s, %s, %s, %s)",
+            [("Target" if i % 2 else "Trader Joe's", f"Product {i}", "", 1 + i % 20) for i in range(500)],
+        )
+        setup.commit()
+        setup.close()
+
+        dashboard = Dashboard(SlowBackend(path, args.rtt_ms / 1000), ttl={section: 0 for section in SECTIONS})
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            for section in SECTIONS:
+                dashboard._load_section(section, 1)  # cache is off, so this always queries
+        sequential_ms = (time.perf_counter() - start) / args.runs * 1000
+
+        async def concurrent():
+            for _ in range(args.runs):
+                await dashboard.load(1)
+
+        start = time.perf_counter()
+        asyncio.run(concurrent())
+        concurrent_ms = (time.perf_counter() - start) / args.runs * 1000
+
+    print(f"simulated round-trip: {args.rtt_ms:.0f} ms per query")
+    print(f"sections one after another: {sequential_ms:.1f} ms")
+    print(f"/dashboard/ (concurrent):   {concurrent_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Microbenchmark: rows/sec serialized for /users/ and /products/.
+
+Compares the default path (dict rows -> jsonable_encoder -> json, as
+FastAPI's JSONResponse does it) with the FAST_RESPONSES path (tuple rows ->
+fetch_records -> FastJSONResponse). No database is needed; rows are generated
+with the same column types MySQL returns.
+
+Usage:
+    python bench_serialization.py
+    python bench_serialization.py --rows 50000 --repeat 5
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from fast_responses import FastJSONResponse, USER_COLUMNS, PRODUCT_COLUMNS, fetch_records
+
+
+class FakeCursor:
+    """Stands in for a mysql.connector cursor that has already run a query."""
+
+    def __init__(self, columns, rows, dictionary=False):
+        self.description = [(name,) for name in columns]
+        self._columns = columns
+        self._rows = rows
+        self._dictionary = dictionary
+
+    def fetchall(self):
+        if self._dictionary:
+            return [dict(zip(self._columns, row)) for row in self._rows]
+        return list(self._rows)
+
+
+def user_rows(n):
+    dob = date(1990, 4, 1)
+    return [
+        (i, f"User {i}", f"user{i}@example.com", dob + timedelta(days=i % 5000),
+         Decimal("55000.00") + i, Decimal("1200.00"))
+        for i in range(n)
+    ]
+
+
+def product_rows(n):
+    checked = datetime(2024, 11, 21, 2, 18, 21)
+    return [
+        (i, "Target" if i % 2 else "Trader Joe's", f"Product {i}",
+         f"https://www.example.com/p/{i}", Decimal("4.99") + Decimal(i % 100) / 100, checked)
+        for i in range(n)
+    ]
+
+
+def default_path(columns, rows):
+    cursor = FakeCursor(columns, rows, dictionary=True)
+    return JSONResponse(jsonable_encoder(cursor.fetchall())).body
+
+
+def fast_path(columns, rows):
+    cursor = FakeCursor(columns, rows)
+    return FastJSONResponse(fetch_records(cursor)).body
+
+
+def bench(fn, columns, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(columns, rows)
+        best = min(best, time.perf_counter() - start)
+    return len(rows) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API response serialization")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    endpoints = [
+        ("/users/", [c.strip() for c in USER_COLUMNS.split(",")], user_rows(args.rows)),
+        ("/products/", [c.strip() for c in PRODUCT_COLUMNS.split(",")], product_rows(args.rows)),
+    ]
+    print(f"{'endpoint':<12} {'default rows/s':>15} {'fast rows/s':>15} {'speedup':>8}")
+    for name, columns, rows in endpoints:
+        default_rate = bench(default_path, columns, rows, args.repeat)
+        fast_rate = bench(fast_path, columns, rows, args.repeat)
+        print(f"{name:<12} {default_rate:>15,.0f} {fast_rate:>15,.0f} {fast_rate / default_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
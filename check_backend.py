@@ -0,0 +1,206 @@
+"""End-to-end check of the API against a storage backend.
+
+Runs the app in-process (startup, CSV upload included) and goes through
+register/login, users, goals, products, watchlists, alerts and the
+dashboard. The same checks are run whichever backend is selected.
+
+By default this uses a throwaway SQLite database. Use --backend mysql to
+run against the MySQL database in .env. It writes test rows, so point it at
+a scratch database.
+
+Usage:
+    python check_backend.py
+    python check_backend.py --backend mysql
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+
+def check(condition, message):
+    if not condition:
+        print(f"FAIL: {message}")
+        sys.exit(1)
+    print(f"ok   {message}")
+
+
+def run_checks():
+    # main reads DB_BACKEND at import time, so import it only after it is set
+    import main
+    from fastapi.testclient import TestClient
+
+    with TestClient(main.app) as client:
+        email = f"check-{int(time.time() * 1000)}@example.com"
+        user = {"name": "Check User", "email": email, "dob": "1990-04-01", "income": 55000, "password": "s3cret"}
+
+        check(client.post("/register", json=user).status_code == 200, "register")
+        check(client.post("/register", json=user).status_code == 400, "register rejects duplicate email")
+        response = client.post("/login", json={"email": email, "password": "s3cret"})
+        check(response.status_code == 200 and "password" not in response.json()["user"], "login")
+        check(client.post("/login", json={"email": email, "password": "wrong"}).status_code == 401, "login rejects bad password")
+
+        user_id = client.get(f"/users/email/{email}").json()["user_id"]
+        check(client.get(f"/users/{user_id}").json()["email"] == email, "get user by id")
+        check(client.get("/users/999999999").status_code == 404, "missing user is 404")
+        response = client.put(f"/users/{user_id}", json={"dob": "1990-04-01", "income": 60000, "budget": 1500})
+        check(response.status_code == 200, "update user")
+        check(float(client.get(f"/users/{user_id}").json()["budget"]) == 1500, "update user persisted")
+        users = client.get("/users/").json()
+        check(any(u["user_id"] == user_id for u in users) and all("password" not in u for u in users), "list users")
+
+        goal = {
+            "user_id": user_id, "status": "Active", "set_date": "2024-03-15", "due_date": "2025-03-15",
+            "goal_type": "Savings", "current_amount": 250, "target_amount": 1000,
+        }
+        check(client.post("/goals/", json=goal).status_code == 200, "create goal")
+        goals = client.get(f"/goals/{user_id}").json()
+        check(len(goals) == 1 and goals[0]["goal_type"] == "Savings", "get goals")
+
+        products = client.get("/products/").json()
+        check(len(products) > 0, "products were uploaded from CSV")
+        search = client.get("/products/", params={"search": "TOMATO"}).json()
+        check(0 < len(search) < len(products) and all("tomato" in p["product_name"].lower() for p in search),
+              "product search is case-insensitive")
+
+        # Fast response path returns the same products and never the password hash
+        main.fast_responses_enabled = True
+        try:
+            check(len(client.get("/products/").json()) == len(products), "fast path products")
+            check(all("password" not in u for u in client.get("/users/").json()), "fast path users")
+        finally:
+            main.fast_responses_enabled = False
+
+        # Watch a product at its current price, raise the stored price, then
+        # re-run the CSV upload so the price drops back and the watch fires
+        product = search[0]
+        price = float(product["price"])
+        response = client.post("/watchlist/", json={"user_id": user_id, "product_id": product["id"], "target_price": price})
+        check(response.status_code == 200, "create watch")
+        watch_id = response.json()["watch_id"]
+        check(client.post("/watchlist/", json={"user_id": user_id, "product_id": 999999999, "target_price": 1}).status_code == 404,
+              "watch on missing product is 404")
+        watchlist = client.get(f"/watchlist/{user_id}").json()
+        check(len(watchlist) == 1 and watchlist[0]["product_name"] == product["product_name"], "get watchlist")
+
+        conn = main.create_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE Marketplace SET price = %s WHERE id = %s", (price + 1, product["id"]))
+        conn.commit()
+        cursor.close()
+        conn.close()
+        main.upload_csv_data()
+        alerts = client.get(f"/alerts/{user_id}").json()
+        check(len(alerts) == 1 and alerts[0]["watch_id"] == watch_id and float(alerts[0]["new_price"]) == price,
+              "price drop triggers alert")
+        main.upload_csv_data()
+        check(len(client.get(f"/alerts/{user_id}").json()) == 1, "unchanged price does not re-trigger")
+
+        # A product listed twice in one upload is updated once, to its last price
+        update_batches = []
+        update_prices = main.backend.update_prices
+        main.backend.update_prices = lambda cursor, rows: update_batches.append(rows) or update_prices(cursor, rows)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                duplicate_csv = os.path.join(tmp, "duplicate.csv")
+                with open(duplicate_csv, mode="w", newline="", encoding="utf-8") as file:
+                    writer = csv.writer(file)
+                    writer.writerow(["store_name", "product_name", "url", "price"])
+                    writer.writerow([product["store_name"], product["product_name"], product["url"], f"${price - 0.5:.2f}"])
+                    writer.writerow([product["store_name"], product["product_name"], product["url"], f"${price + 2:.2f}"])
+                main.upload_csv_data([duplicate_csv])
+        finally:
+            main.backend.update_prices = update_prices
+        ids = [row[0] for rows in update_batches for row in rows]
+        stored = client.get("/products/", params={"search": product["product_name"]}).json()
+        check(ids == [product["id"]] and any(p["id"] == product["id"] and float(p["price"]) == price + 2 for p in stored),
+              "duplicate CSV rows update the product once")
+        check(len(client.get(f"/alerts/{user_id}").json()) == 1, "duplicate CSV rows alert on the stored price only")
+
+        # Every worker uploads on startup; the price drops back once, so it alerts once
+        uploads = [threading.Thread(target=main.upload_csv_data) for _ in range(4)]
+        for upload in uploads:
+            upload.start()
+        for upload in uploads:
+            upload.join()
+        check(len(client.get(f"/alerts/{user_id}").json()) == 2, "concurrent uploads alert once per drop")
+
+        check(client.delete(f"/watchlist/{watch_id}").status_code == 200, "delete watch")
+        check(client.delete(f"/watchlist/{watch_id}").status_code == 404, "deleting missing watch is 404")
+
+        conn = main.create_connection()
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO Expenses (date, amount, category, user_id) VALUES (%s, %s, %s, %s)", [
+            (date.today(), 100, "Groceries", user_id),
+            (date.today(), 50, "Entertainment", user_id),
+            (date.today() - timedelta(days=62), 900, "Rent", user_id),  # outside this month
+        ])
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+        dashboard = client.get(f"/dashboard/{user_id}").json()
+        check(dashboard["profile"]["email"] == email and "password" not in dashboard["profile"], "dashboard profile")
+        check(dashboard["goals"][0]["progress"] == 25.0 and dashboard["goals"][0]["remaining"] == 750, "dashboard goal progress")
+        check(dashboard["budget"]["spent"] == 150 and dashboard["budget"]["remaining"] == 1350, "dashboard budget vs spending")
+        check(len(dashboard["comparisons"]["stores"]) >= 2 and "Target" in dashboard["comparisons"]["featured"],
+              "dashboard price comparisons")
+
+        dashboard = client.get(f"/dashboard/{user_id}", params={"sections": "profile,goals", "fields": "profile.name,goals.progress"}).json()
+        check(dashboard == {"profile": {"name": "Check User"}, "goals": [{"progress": 25.0}]}, "dashboard section and field selection")
+        check(client.get(f"/dashboard/{user_id}", params={"sections": "nope"}).status_code == 400, "dashboard rejects unknown section")
+        check(client.get("/dashboard/999999999").status_code == 404, "dashboard for missing user is 404")
+
+        client.put(f"/users/{user_id}", json={"dob": "1990-04-01", "income": 60000, "budget": 2000})
+        check(client.get(f"/dashboard/{user_id}").json()["budget"]["remaining"] == 1850, "user update invalidates cached dashboard")
+
+        # An update that lands while a dashboard is loading must not be cached over
+        import dashboard as dashboard_module
+        loading, resume = threading.Event(), threading.Event()
+        load_budget = dashboard_module.LOADERS["budget"]
+
+        def paused_load_budget(cursor, user_id):
+            value = load_budget(cursor, user_id)
+            loading.set()
+            resume.wait(5)
+            return value
+
+        main.dashboard.cache.invalidate(user_id)
+        dashboard_module.LOADERS["budget"] = paused_load_budget
+        try:
+            stale_load = threading.Thread(target=client.get, args=(f"/dashboard/{user_id}",))
+            stale_load.start()
+            loading.wait(5)
+            client.put(f"/users/{user_id}", json={"dob": "1990-04-01", "income": 60000, "budget": 2500})
+            resume.set()
+            stale_load.join()
+        finally:
+            dashboard_module.LOADERS["budget"] = load_budget
+        check(client.get(f"/dashboard/{user_id}").json()["budget"]["remaining"] == 2350,
+              "update during a dashboard load is not cached over")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run end-to-end API checks against a storage backend")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    args = parser.parse_args()
+
+    os.environ["DB_BACKEND"] = args.backend
+    # Every request here comes from one client, which the per-client rate
+    # limits would soon reject; overload_check.py covers admission control
+    os.environ["ADMISSION_CONTROL"] = "0"
+    if args.backend == "sqlite":
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["SQLITE_PATH"] = os.path.join(tmp, "check.db")
+            run_checks()
+    else:
+        run_checks()
+    print(f"OK ({args.backend})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cold-start budget check for the API process.
+
+Imports main.py in a fresh interpreter under `python -X importtime` and fails
+if the import takes longer than the budget, uses more memory than the budget,
+or pulls in a module that should only be loaded lazily (pandas, openai).
+
+FastAPI is imported first and timed separately. It takes about 400 ms on its
+own and varies a lot from run to run, so the budget covers only the time
+main.py adds on top of it.
+
+Usage:
+    python check_startup.py
+    python check_startup.py --import-budget-ms 200 --rss-budget-mb 50 --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules that must not be imported just to start the app
+LAZY_MODULES = ["pandas", "openai"]
+
+# Framework imports main.py can't avoid; their time isn't counted against the budget
+BASELINE_MODULES = ["fastapi", "fastapi.middleware.cors"]
+
+# Prints peak RSS after importing main so the parent can read it from stdout
+PROBE = (
+    "import resource, sys\n"
+    f"import {', '.join(BASELINE_MODULES)}\n"
+    "import main\n"
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    "print(rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024)\n"
+)
+
+
+def run_probe():
+    """Imports main.py once and returns (main ms, FastAPI ms, peak RSS in MB, imported module names)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit("Importing main.py failed.")
+
+    import_us = None
+    baseline_us = 0
+    modules = set()
+    # Lines look like: "import time:       759 |     225547 |     aiohttp"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header line
+        name = parts[2].strip()
+        modules.add(name)
+        if name == "main":
+            import_us = int(parts[1])
+        elif name in BASELINE_MODULES:
+            baseline_us += int(parts[1])
+
+    rss_mb = float(result.stdout.strip().splitlines()[-1])
+    return import_us / 1000, baseline_us / 1000, rss_mb, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time and memory of main.py")
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 250)),
+                        help="budget for main.py's import time on top of FastAPI")
+    parser.add_argument("--rss-budget-mb", type=float, default=float(os.getenv("RSS_BUDGET_MB", 60)))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # The best of several runs keeps a noisy machine from failing the check
+    samples = [run_probe() for _ in range(args.runs)]
+    import_ms = min(s[0] for s in samples)
+    baseline_ms = min(s[1] for s in samples)
+    rss_mb = min(s[2] for s in samples)
+    modules = samples[0][3]
+
+    print(f"FastAPI import:   {baseline_ms:.1f} ms (not budgeted)")
+    print(f"main import time: {import_ms:.1f} ms on top of FastAPI (budget {args.import_budget_ms:.0f} ms)")
+    print(f"peak RSS:         {rss_mb:.1f} MB (budget {args.rss_budget_mb:.0f} MB)")
+
+    failures = []
+    eager = [m for m in LAZY_MODULES if m in modules]
+    if eager:
+        failures.append(f"lazily loaded modules imported at startup: {', '.join(eager)}")
+    if import_ms > args.import_budget_ms:
+        failures.append("import time over budget")
+    if rss_mb > args.rss_budget_mb:
+        failures.append("RSS over budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
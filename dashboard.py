@@ -0,0 +1,227 @@
+"""Aggregated dashboard data for /dashboard/{user_id}.
+
+Each section (profile, goals, budget, comparisons) is loaded by its own
+query on its own pooled connection. The sections run concurrently in worker
+threads, so a dashboard takes about as long as its slowest query, not the
+sum of all of them. Loaded sections are cached for a short time. Writes
+invalidate the user's cached sections, and fields can be selected per section.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from fast_responses import USER_COLUMNS
+
+SECTIONS = ["profile", "goals", "budget", "comparisons"]
+
+# Seconds a loaded section is reused. Comparisons are the same for every user
+# and only change when products are re-scraped.
+CACHE_TTL = {"profile": 30, "goals": 30, "budget": 30, "comparisons": 300}
+
+FEATURED_PER_STORE = 3
+
+
+class SectionCache:
+    """Thread-safe TTL cache keyed by (section, user_id), with LRU eviction.
+
+    Each user has a generation number that invalidate() bumps. A load reads
+    it before querying and passes it to set(), so values loaded before a
+    write are not cached after the write invalidated them.
+    """
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}  # user_id -> number of invalidations
+        self._lock = threading.Lock()
+
+    def generation(self, user_id):
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, section, user_id):
+        key = (section, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, section, user_id, value, generation=None):
+        """Caches value, unless user_id was invalidated since generation was read."""
+        key = (section, user_id)
+        with self._lock:
+            if generation is not None and self._generations.get(user_id, 0) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl[section], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id, *sections):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for section in sections or SECTIONS:
+                self._entries.pop((section, user_id), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _number(value):
+    # MySQL returns DECIMAL columns and SUM() as Decimal, SQLite as float
+    return float(value) if value is not None else None
+
+
+def load_profile(cursor, user_id):
+    cursor.execute(f"SELECT {USER_COLUMNS} FROM Users WHERE user_id = %s", (user_id,))
+    return cursor.fetchone()
+
+
+def load_goals(cursor, user_id):
+    cursor.execute("SELECT * FROM Goals WHERE user_id = %s", (user_id,))
+    goals = cursor.fetchall()
+    for goal in goals:
+        current, target = goal["current_amount"], goal["target_amount"]
+        goal["progress"] = round(current / target * 100, 2) if target else 0.0
+        goal["remaining"] = round(max(target - current, 0), 2)
+    return goals
+
+
+def load_budget(cursor, user_id):
+    """Budget vs spending for the current calendar month."""
+    today = date.today()
+    month_start = today.replace(day=1)
+    next_month = date(today.year + today.month // 12, today.month % 12 + 1, 1)
+
+    cursor.execute("SELECT budget FROM Users WHERE user_id = %s", (user_id,))
+    user = cursor.fetchone()
+    budget = _number(user["budget"]) if user else None
+
+    cursor.execute("""
+        SELECT category, SUM(amount) AS spent FROM Expenses
+        WHERE user_id = %s AND date >= %s AND date < %s
+        GROUP BY category
+    """, (user_id, month_start, next_month))
+    by_category = {row["category"]: _number(row["spent"]) for row in cursor.fetchall()}
+    spent = round(sum(by_category.values()), 2)
+
+    return {
+        "month": month_start.strftime("%Y-%m"),
+        "budget": budget,
+        "spent": spent,
+        "remaining": round(budget - spent, 2) if budget is not None else None,
+        "by_category": by_category,
+    }
+
+
+def load_comparisons(cursor, user_id=None):
+    """Per-store price summary and the cheapest products in each store (the same for every user)."""
+    cursor.execute("""
+        SELECT store_name, COUNT(*) AS products, AVG(price) AS avg_price, MIN(price) AS min_price
+        FROM Marketplace GROUP BY store_name
+    """)
+    stores = [
+        {
+            "store_name": row["store_name"],
+            "products": row["products"],
+            "avg_price": round(_number(row["avg_price"]), 2),
+            "min_price": _number(row["min_price"]),
+        }
+        for row in cursor.fetchall()
+    ]
+
+    # Only the cheapest few rows per store leave the database
+    # (window functions need MySQL 8+ / SQLite 3.25+)
+    cursor.execute("""
+        SELECT id, store_name, product_name, price FROM (
+            SELECT id, store_name, product_name, price,
+                   ROW_NUMBER() OVER (PARTITION BY store_name ORDER BY price, id) AS store_rank
+            FROM Marketplace
+        ) ranked
+        WHERE store_rank <= %s
+        ORDER BY store_name, store_rank
+    """, (FEATURED_PER_STORE,))
+    featured = {}
+    for row in cursor.fetchall():
+        row["price"] = _number(row["price"])
+        featured.setdefault(row["store_name"], []).append(row)
+
+    return {"stores": stores, "featured": featured}
+
+
+LOADERS = {
+    "profile": load_profile,
+    "goals": load_goals,
+    "budget": load_budget,
+    "comparisons": load_comparisons,
+}
+
+
+def select_fields(value, fields):
+    """Keeps only the given keys of a section (each item, for list sections)."""
+    if not fields or value is None:
+        return value
+    if isinstance(value, list):
+        return [{k: v for k, v in item.items() if k in fields} for item in value]
+    return {k: v for k, v in value.items() if k in fields}
+
+
+class Dashboard:
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.cache = SectionCache(ttl or CACHE_TTL)
+
+    def _load_section(self, section, user_id):
+        """Returns (value, generation) for one section, from the cache if possible.
+
+        generation is the cache generation read before querying, or None if
+        the value came from the cache.
+        """
+        # Comparisons aren't per-user, so they share one cache entry
+        cache_key = None if section == "comparisons" else user_id
+        value = self.cache.get(section, cache_key)
+        if value is not None:
+            return value, None
+        generation = self.cache.generation(cache_key)
+
+        conn = self.backend.connect(pooled=True)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                return LOADERS[section](cursor, user_id), generation
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+
+    async def load(self, user_id, sections=None, fields=None):
+        """Loads the requested sections concurrently, or returns None if the user doesn't exist.
+
+        The profile is always loaded alongside the other sections to check
+        the user exists; nothing is cached for unknown users. fields maps a
+        section name to the set of keys to return for it; sections with no
+        entry are returned whole.
+        """
+        sections = sections or SECTIONS
+        fields = fields or {}
+        to_load = sections if "profile" in sections else ["profile"] + list(sections)
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._load_section, section, user_id) for section in to_load
+        ))
+        loaded = dict(zip(to_load, results))
+
+        if loaded["profile"][0] is None:
+            return None
+        for section, (value, generation) in loaded.items():
+            if generation is not None:
+                self.cache.set(section, None if section == "comparisons" else user_id, value, generation)
+
+        return {section: select_fields(loaded[section][0], fields.get(section)) for section in sections}
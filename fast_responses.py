@@ -0,0 +1,72 @@
+"""Opt-in fast response path for list endpoints (enabled with FAST_RESPONSES=1).
+
+Rows are fetched as plain tuples, turned into dicts in one pass using the
+cursor's column names, and encoded straight to JSON bytes. Returning a
+Response skips FastAPI's jsonable_encoder and response model validation,
+so the models below only document the response shape.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard json module
+    orjson = None
+
+
+# Columns returned by the fast path; the password hash is never selected
+USER_COLUMNS = "user_id, name, email, dob, income, budget"
+PRODUCT_COLUMNS = "id, store_name, product_name, url, price, last_checked_at"
+
+
+class UserOut(BaseModel):
+    user_id: int
+    name: str
+    email: str
+    dob: Optional[date]
+    income: Optional[float]
+    budget: Optional[float]
+
+
+class ProductOut(BaseModel):
+    id: int
+    store_name: str
+    product_name: str
+    url: Optional[str]
+    price: float
+    last_checked_at: Optional[datetime]
+
+
+def fetch_records(cursor) -> List[dict]:
+    """Builds a list of dicts from a tuple-row cursor that has already been executed."""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _default(value):
+    # orjson handles date/datetime natively; only Decimal needs converting.
+    # Matches jsonable_encoder: whole-number decimals become ints.
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Encodes content to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,7 +1,6 @@
-import mysql.connector
-from mysql.connector import Error
 from dotenv import load_dotenv
 import os
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -9,23 +8,44 @@ import csv
 from datetime import datetime, date
 import re
 import bcrypt
-import openai
-import pandas as pd
+from storage import Error, batches, get_backend
+from typing import List
+from alerts import AlertEngine
+from dashboard import Dashboard, SECTIONS
+from admission import AdmissionController, AdmissionMiddleware
+from fast_responses import FastJSONResponse, UserOut, ProductOut, USER_COLUMNS, PRODUCT_COLUMNS, fetch_records
 
 # Load environment variables
 load_dotenv()
 
-db_host = os.getenv("db_host")
-db_user = os.getenv("db_user")
-db_pass = os.getenv("db_pass")
-db_name = os.getenv("db_name")
+# Storage backend: DB_BACKEND=mysql (default, uses db_host/db_user/db_pass/db_name)
+# or DB_BACKEND=sqlite (embedded database at SQLITE_PATH)
+backend = get_backend()
 
-#openai key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Set PREWARM_COMPARE_PRICES=1 to load pandas/openai in the background at startup
+prewarm_compare_prices = os.getenv("PREWARM_COMPARE_PRICES", "0") == "1"
+
+# Set FAST_RESPONSES=1 to serve /users/ and /products/ through the fast JSON path
+fast_responses_enabled = os.getenv("FAST_RESPONSES", "0") == "1"
+
+# Set ADMISSION_CONTROL=0 to turn off per-route concurrency and rate limits
+admission_enabled = os.getenv("ADMISSION_CONTROL", "1") == "1"
 
 # Initialize FastAPI app
 app = FastAPI()
 
+# Watches indexed by product, checked when ingestion changes a price
+alert_engine = AlertEngine()
+
+# Loads /dashboard/ sections concurrently on pooled connections, with caching
+dashboard = Dashboard(backend)
+
+# Per-route concurrency, queue and rate limits. Added before CORS so that
+# rejected requests still get CORS headers.
+admission_controller = AdmissionController()
+if admission_enabled:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Add CORS middleware to allow requests from localhost:3000
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +55,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Queue depth, in-flight requests and rejection counters per route class
+@app.get("/admission/stats")
+async def admission_stats():
+    return admission_controller.stats()
+
+# Route handlers that call bcrypt or the database are plain `def`, so FastAPI
+# runs them in its threadpool instead of blocking the event loop.
+
 # Define request models for login and registration
 class LoginRequest(BaseModel):
     email: str
@@ -58,6 +86,13 @@ class GoalRequest(BaseModel):
     target_amount: float
 
 
+# Watchlist Request Model
+class WatchRequest(BaseModel):
+    user_id: int
+    product_id: int
+    target_price: float
+
+
 class UpdateUserModel(BaseModel):
     dob: str
     income: int
@@ -69,13 +104,8 @@ class UpdateUserModel(BaseModel):
 def create_connection():
     """Creates and returns a connection to the database."""
     try:
-        conn = mysql.connector.connect(
-            host=db_host,
-            database=db_name,
-            user=db_user,
-            password=db_pass
-        )
-        if conn.is_connected():
+        conn = backend.connect()
+        if conn:
             print("Database connection established.")
             return conn
     except Error as error:
@@ -83,7 +113,7 @@ def create_connection():
         return None
 
 @app.post("/login")
-async def login(request: LoginRequest):
+def login(request: LoginRequest):
     try:
         conn = create_connection()
         if not conn:
@@ -104,7 +134,7 @@ async def login(request: LoginRequest):
 
 
 @app.post("/register")
-async def register(request: RegisterRequest):
+def register(request: RegisterRequest):
     try:
         print("Incoming request:", request.dict())  # Debug log
         conn = create_connection()
@@ -133,15 +163,25 @@ async def register(request: RegisterRequest):
 
 
 # Get All Users
-@app.get("/users/")
-async def get_all_users():
+@app.get("/users/", responses={200: {"model": List[UserOut]}})
+def get_all_users():
     try:
         conn = create_connection()
         if not conn:
             raise HTTPException(status_code=500, detail="Database connection failed.")
+
+        if fast_responses_enabled:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM Users")
+            users = fetch_records(cursor)
+            if not users:
+                return {"message": "No users found"}
+            return FastJSONResponse(users)
+
         cursor = conn.cursor(dictionary=True)
         
-        query = "SELECT * FROM Users"
+        # Same columns as the fast path: never return the password hash
+        query = f"SELECT {USER_COLUMNS} FROM Users"
         cursor.execute(query)
         users = cursor.fetchall()
         
@@ -162,7 +202,7 @@ async def get_all_users():
 
 # Get User by ID
 @app.get("/users/{user_id}")
-async def get_user(user_id: int):
+def get_user(user_id: int):
     try:
         conn = create_connection()
         cursor = conn.cursor(dictionary=True)
@@ -186,7 +226,7 @@ async def get_user(user_id: int):
             conn.close()
 
 @app.get("/users/email/{email}")
-async def get_user_by_email(email: str):
+def get_user_by_email(email: str):
     try:
         conn = create_connection()
         cursor = conn.cursor(dictionary=True)
@@ -205,7 +245,7 @@ async def get_user_by_email(email: str):
         if conn:
             conn.close()
 @app.put("/users/{user_id}")
-async def update_user(user_id: int, user: UpdateUserModel):
+def update_user(user_id: int, user: UpdateUserModel):
     try:
         conn = create_connection()
         if not conn:
@@ -219,6 +259,7 @@ async def update_user(user_id: int, user: UpdateUserModel):
         """
         cursor.execute(query, (user.dob, user.income, user.budget, user_id))
         conn.commit()
+        dashboard.cache.invalidate(user_id, "profile", "budget")
 
         return {"message": "User updated successfully"}
     except Error as error:
@@ -231,8 +272,8 @@ async def update_user(user_id: int, user: UpdateUserModel):
             conn.close()
 
 # Function to upload data from CSV to the database
-def upload_csv_data():
-    csv_file_paths = [
+def upload_csv_data(csv_file_paths=None):
+    csv_file_paths = csv_file_paths or [
         "trader_joes_products.csv",  # Trader Joe's products
         "scraped_products.csv"       # Target products
     ]
@@ -243,47 +284,83 @@ def upload_csv_data():
             raise HTTPException(status_code=500, detail="Database connection failed.")
         cursor = conn.cursor()
 
-        for csv_file_path in csv_file_paths:
-            if not os.path.exists(csv_file_path):
-                print(f"CSV file '{csv_file_path}' not found, skipping.")
-                continue
-
-            print(f"Processing file: {csv_file_path}")
-            with open(csv_file_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Clean the 'price' field to remove any non-numeric characters
-                    price_str = row['price']
-                    cleaned_price = re.sub(r'[^\d.]', '', price_str)
-
-                    # Convert the cleaned price to a float
-                    try:
-                        price = float(cleaned_price)
-                    except ValueError:
-                        print(f"Invalid price format for product {row['product_name']}: {price_str}")
-                        continue
-
-                    # Check for existing entry to avoid duplicates
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM Marketplace WHERE product_name = %s AND store_name = %s
-                    """, (row['product_name'], row['store_name']))
-                    count = cursor.fetchone()[0]
-
-                    if count == 0:  # Insert only if the entry doesn't already exist
-                        query = """
-                        INSERT INTO Marketplace (store_name, product_name, url, price, last_checked_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                        """
-                        cursor.execute(query, (
-                            row['store_name'],
-                            row['product_name'],
-                            row['url'],
-                            price,
-                            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        ))
-                        print(f"Inserted product: {row['product_name']} from {row['store_name']}")
-
-        conn.commit()
+        # Held until the commit, so concurrent workers don't alert on the same drop twice
+        with backend.ingestion_lock(conn):
+            # Load existing products once instead of querying for every CSV row
+            cursor.execute("SELECT id, product_name, store_name, price FROM Marketplace")
+            existing = {(name, store): (product_id, float(price)) for product_id, name, store, price in cursor.fetchall()}
+            new_products = []
+            # product_id -> (price, last_checked_at); a product listed twice keeps its last row
+            price_updates = {}
+            old_prices = {}  # product_id -> price before this upload
+
+            for csv_file_path in csv_file_paths:
+                if not os.path.exists(csv_file_path):
+                    print(f"CSV file '{csv_file_path}' not found, skipping.")
+                    continue
+
+                print(f"Processing file: {csv_file_path}")
+                with open(csv_file_path, mode='r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    for row in reader:
+                        # Clean the 'price' field to remove any non-numeric characters
+                        price_str = row['price']
+                        cleaned_price = re.sub(r'[^\d.]', '', price_str)
+
+                        # Convert the cleaned price to a float
+                        try:
+                            price = float(cleaned_price)
+                        except ValueError:
+                            print(f"Invalid price format for product {row['product_name']}: {price_str}")
+                            continue
+
+                        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        key = (row['product_name'], row['store_name'])
+
+                        if key not in existing:  # Insert only if the entry doesn't already exist
+                            new_products.append((row['store_name'], row['product_name'], row['url'], price, now))
+                            # New products can't have watches yet, so their id isn't needed
+                            existing[key] = (None, price)
+                            continue
+
+                        product_id, old_price = existing[key]
+                        if product_id is not None and round(old_price, 2) != round(price, 2):
+                            old_prices.setdefault(product_id, old_price)
+                            price_updates[product_id] = (price, now)
+                            existing[key] = (product_id, price)
+
+            # Only the watches on changed products are checked, against the price actually stored
+            triggered_alerts = []
+            for product_id, (price, _) in price_updates.items():
+                triggered_alerts.extend(alert_engine.price_changed(product_id, old_prices[product_id], price))
+
+            # Write in batches rather than one statement per CSV row
+            for batch in batches(new_products):
+                cursor.executemany("""
+                    INSERT INTO Marketplace (store_name, product_name, url, price, last_checked_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, batch)
+            if new_products:
+                print(f"Inserted {len(new_products)} products.")
+            if price_updates:
+                backend.update_prices(cursor, [
+                    (product_id, price, checked_at) for product_id, (price, checked_at) in price_updates.items()
+                ])
+                print(f"Updated {len(price_updates)} prices.")
+
+            alert_rows = [
+                (a['user_id'], a['watch_id'], a['product_id'], a['target_price'], a['old_price'], a['new_price'], a['created_at'])
+                for a in triggered_alerts
+            ]
+            for batch in batches(alert_rows):
+                cursor.executemany("""
+                    INSERT INTO Alerts (user_id, watch_id, product_id, target_price, old_price, new_price, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, batch)
+            if alert_rows:
+                print(f"Queued {len(alert_rows)} price-drop alerts.")
+
+            conn.commit()
         print("CSV data uploaded successfully.")
     except Error as error:
         print(f"Error during CSV upload: {error}")
@@ -294,12 +371,22 @@ def upload_csv_data():
             conn.close()
 
 # Endpoint to fetch products
-@app.get("/products/")
-async def get_products(search: str = None):
+@app.get("/products/", responses={200: {"model": List[ProductOut]}})
+def get_products(search: str = None):
     try:
         conn = create_connection()
         if not conn:
             raise HTTPException(status_code=500, detail="Database connection failed.")
+
+        if fast_responses_enabled:
+            cursor = conn.cursor()
+            if search:
+                query = f"SELECT {PRODUCT_COLUMNS} FROM Marketplace WHERE LOWER(product_name) LIKE %s"
+                cursor.execute(query, (f"%{search.lower()}%",))
+            else:
+                cursor.execute(f"SELECT {PRODUCT_COLUMNS} FROM Marketplace")
+            return FastJSONResponse(fetch_records(cursor))
+
         cursor = conn.cursor(dictionary=True)
 
         if search:
@@ -319,33 +406,20 @@ async def get_products(search: str = None):
         if conn:
             conn.close()
 
-# Function to ensure the Goals table exists
-def ensure_goals_table():
-    """Ensures that the Goals table exists in the database."""
+# Function to ensure all tables and indexes exist
+def ensure_tables():
+    """Ensures that every table the API uses exists in the database."""
     try:
         conn = create_connection()
         if not conn:
             raise HTTPException(status_code=500, detail="Database connection failed.")
         cursor = conn.cursor()
-        
-        # SQL query to create the Goals table if it doesn't exist
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS Goals (
-            goal_id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            status VARCHAR(50) NOT NULL,
-            set_date DATE NOT NULL,
-            due_date DATE NOT NULL,
-            goal_type VARCHAR(255) NOT NULL,
-            current_amount FLOAT NOT NULL,
-            target_amount FLOAT NOT NULL
-        );
-        """
-        cursor.execute(create_table_query)
+
+        backend.create_tables(cursor)
         conn.commit()
-        print("Checked/Created Goals table.")
+        print(f"Checked/Created tables ({backend.name}).")
     except Error as error:
-        print(f"Error ensuring Goals table exists: {error}")
+        print(f"Error ensuring tables exist: {error}")
     finally:
         if cursor:
             cursor.close()
@@ -354,7 +428,7 @@ def ensure_goals_table():
 
 # Fetch all goals for a user
 @app.get("/goals/{user_id}")
-async def get_goals(user_id: int):
+def get_goals(user_id: int):
     try:
         conn = create_connection()
         if not conn:
@@ -375,7 +449,7 @@ async def get_goals(user_id: int):
 
 # Create a new goal
 @app.post("/goals/")
-async def create_goal(goal: GoalRequest):
+def create_goal(goal: GoalRequest):
     try:
         print(f"Received goal: {goal}")  # Log the incoming goal data
         conn = create_connection()
@@ -397,6 +471,7 @@ async def create_goal(goal: GoalRequest):
             goal.target_amount,
         ))
         conn.commit()
+        dashboard.cache.invalidate(goal.user_id, "goals")
 
         print(f"Goal inserted with ID: {cursor.lastrowid}")  # Log success
         return {"message": "Goal created successfully", "goal_id": cursor.lastrowid}
@@ -409,110 +484,173 @@ async def create_goal(goal: GoalRequest):
         if conn:
             conn.close()
 
-# Function to read products from a CSV file using Pandas
-def read_products_from_csv(file_path: str) -> pd.DataFrame:
-    """Reads product data from a CSV file and returns it as a Pandas DataFrame."""
-    try:
-        # Load the CSV into a DataFrame
-        df = pd.read_csv(file_path)
-
-        # Clean the 'price' column by removing non-numeric characters and converting it to float
-        df['price'] = df['price'].replace({r'[^\d.]': ''}, regex=True)  # Keep only digits and decimal points
-        df['price'] = pd.to_numeric(df['price'], errors='coerce')  # Convert to float, invalid values become NaN
-
-        # Remove rows where price is NaN (invalid data)
-        df = df.dropna(subset=['price'])
-
-        return df[['product_name', 'price']]  # Return only the necessary columns
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"CSV file '{file_path}' not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-# Price comparison function using OpenAI
-def generate_price_comparison_summary(target_df: pd.DataFrame, trader_joes_df: pd.DataFrame) -> str:
-    # Convert DataFrames to a string format for OpenAI
-    target_products_str = target_df.to_dict(orient='records')
-    trader_joes_products_str = trader_joes_df.to_dict(orient='records')
+# Dashboard: profile, goals with progress, budget vs spending and featured
+# price comparisons in one call. Select sections with ?sections=profile,goals
+# and fields with ?fields=profile.name,goals.progress
+@app.get("/dashboard/{user_id}")
+async def get_dashboard(user_id: int, sections: str = None, fields: str = None):
+    requested = [name.strip() for name in sections.split(",") if name.strip()] if sections else SECTIONS
+    unknown = [name for name in requested if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+
+    selected_fields = {}
+    for entry in (fields.split(",") if fields else []):
+        section, _, field = entry.strip().partition(".")
+        if section not in SECTIONS or not field:
+            raise HTTPException(status_code=400, detail=f"Invalid field '{entry.strip()}', expected section.field")
+        selected_fields.setdefault(section, set()).add(field)
 
-    prompt = f"""
-    You are a price comparison assistant. I will provide you with product prices from two stores, Target and Trader Joe's.
-
-    Please compare the prices of the following products between the two stores. You do not need to rely on exact product names but instead use your understanding to evaluate if two products are similar. For example, "Red Onion" and "Onion" can be considered the same. Use keywords, context, and common product categories to determine similarity. If two products are different but belong to the same category (e.g., onions, tomatoes, garlic, herbs), treat them as similar.
-
-    If a product is found in both stores, calculate the percentage price difference. If a product is only found in one store, try to find a similar product from the other store and treat it as part of the same category. If no equivalent product is found in the other store, ignore it in your comparison.
+    try:
+        data = await dashboard.load(user_id, requested, selected_fields)
+    except Error as error:
+        raise HTTPException(status_code=500, detail=str(error))
 
-    For the summary, display **5 example products** that are available in both stores, showing their price differences and the percentage difference between them. Each example should include the following:
-    - Product Name
-    - Target Price
-    - Trader Joe's Price
-    - Percentage Price Difference (rounded to 2 decimal places)
+    if data is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return data
 
-    Ensure that the examples reflect a range of price differences:
-    1. One example where Target is more expensive.
-    2. One example where Trader Joe's is more expensive.
-    3. One example where the prices are equal.
-    4. The other examples should show diverse products with varied price differences.
+# Load all watches into the alert engine
+def load_watches():
+    try:
+        conn = create_connection()
+        if not conn:
+            raise HTTPException(status_code=500, detail="Database connection failed.")
+        cursor = conn.cursor()
+        cursor.execute("SELECT watch_id, user_id, product_id, target_price FROM Watchlist")
+        alert_engine.load_watches(cursor.fetchall())
+        print(f"Loaded {len(alert_engine)} watches.")
+    except Error as error:
+        print(f"Error loading watches: {error}")
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-    Please also provide a general **overall summary** comparing the two stores:
-    - Which store generally has better prices (Target or Trader Joe's)?
-    - What is the approximate percentage difference in prices across all products compared (if applicable)?
+# Watch a product
+@app.post("/watchlist/")
+def create_watch(watch: WatchRequest):
+    try:
+        conn = create_connection()
+        if not conn:
+            raise HTTPException(status_code=500, detail="Database connection failed.")
+        cursor = conn.cursor()
 
-    Here is the data you should consider:
+        cursor.execute("SELECT id FROM Marketplace WHERE id = %s", (watch.product_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Product not found")
 
-    Target Products:
-    {target_products_str}
+        query = """
+        INSERT INTO Watchlist (user_id, product_id, target_price, created_at)
+        VALUES (%s, %s, %s, %s)
+        """
+        cursor.execute(query, (
+            watch.user_id,
+            watch.product_id,
+            watch.target_price,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ))
+        conn.commit()
 
-    Trader Joe's Products:
-    {trader_joes_products_str}
+        alert_engine.add_watch(cursor.lastrowid, watch.user_id, watch.product_id, watch.target_price)
+        return {"message": "Watch created successfully", "watch_id": cursor.lastrowid}
+    except Error as error:
+        raise HTTPException(status_code=500, detail=str(error))
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-    Please provide the results in an HTML format. Use the following structure:
+# Fetch a user's watchlist with current prices
+@app.get("/watchlist/{user_id}")
+def get_watchlist(user_id: int):
+    try:
+        conn = create_connection()
+        if not conn:
+            raise HTTPException(status_code=500, detail="Database connection failed.")
+        cursor = conn.cursor(dictionary=True)
 
-    <h3>Example Products:</h3>
-    <ul>
-        <li><strong>Product Name:</strong> Product1 <br> <strong>Target Price:</strong> $5.89 <br> <strong>Trader Joe's Price:</strong> $2.29 <br> <strong>Percentage Price Difference:</strong> 61.16%</li>
-        <!-- Add other products here -->
-    </ul>
+        query = """
+        SELECT w.watch_id, w.product_id, w.target_price, w.created_at,
+               m.product_name, m.store_name, m.price AS current_price
+        FROM Watchlist w JOIN Marketplace m ON m.id = w.product_id
+        WHERE w.user_id = %s
+        """
+        cursor.execute(query, (user_id,))
+        return cursor.fetchall()
+    except Error as error:
+        raise HTTPException(status_code=500, detail=str(error))
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-    <h3>Overall Summary</h3>
-    <p>Trader Joe's generally has better prices as seen in the provided examples. The average savings when shopping at Trader Joe's compared to Target is approximately 33.05%.</p>
+# Stop watching a product
+@app.delete("/watchlist/{watch_id}")
+def delete_watch(watch_id: int):
+    try:
+        conn = create_connection()
+        if not conn:
+            raise HTTPException(status_code=500, detail="Database connection failed.")
+        cursor = conn.cursor()
 
-    Please format the output using <strong>HTML tags</strong> to improve readability.
+        cursor.execute("DELETE FROM Watchlist WHERE watch_id = %s", (watch_id,))
+        conn.commit()
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Watch not found")
 
-    Dont include ```html or anything. Include a brief text in <p> in the beginning along the lines 'Let's have a look at the data we obtained this week'
+        alert_engine.remove_watch(watch_id)
+        return {"message": "Watch deleted successfully"}
+    except Error as error:
+        raise HTTPException(status_code=500, detail=str(error))
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-    Please provide a concise and professional summary, avoiding unnecessary details.
-    """
-    print('woop')
-    
-    
+# Fetch a user's price-drop alerts, newest first
+@app.get("/alerts/{user_id}")
+def get_alerts(user_id: int):
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a price comparison assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        print('womp')
-        print(response['choices'][0]['message']['content'])  # Access the AI's response
-    except Exception as e:
-        print("API Call Failed:", str(e))
-
-    # Get the OpenAI response (summary)
-    summary = response['choices'][0]['message']['content'].strip()
+        conn = create_connection()
+        if not conn:
+            raise HTTPException(status_code=500, detail="Database connection failed.")
+        cursor = conn.cursor(dictionary=True)
 
-    print(summary)
-    return summary
+        query = """
+        SELECT a.alert_id, a.watch_id, a.product_id, m.product_name, m.store_name,
+               a.target_price, a.old_price, a.new_price, a.created_at
+        FROM Alerts a JOIN Marketplace m ON m.id = a.product_id
+        WHERE a.user_id = %s
+        ORDER BY a.created_at DESC, a.alert_id DESC
+        """
+        cursor.execute(query, (user_id,))
+        return cursor.fetchall()
+    except Error as error:
+        raise HTTPException(status_code=500, detail=str(error))
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
-# API endpoint to compare prices between Target and Trader Joe's
+# API endpoint to compare prices between Target and Trader Joe's.
+# Plain def so FastAPI runs it in the threadpool: the first call imports
+# pandas/openai and every call blocks on the OpenAI request.
 @app.post("/compare_prices")
-async def compare_prices():
+def compare_prices():
     # Define file paths for the CSV files
     print("im here")
     target_file_path = "scraped_products.csv"  # Path to your Target CSV file
     trader_joes_file_path = "trader_joes_products.csv"  # Path to your Trader Joe's CSV file
 
+    # Imported here so pandas/openai stay out of worker startup
+    from price_comparison import read_products_from_csv, generate_price_comparison_summary
+
     # Read products from both CSV files using Pandas
     target_df = read_products_from_csv(target_file_path)
     trader_joes_df = read_products_from_csv(trader_joes_file_path)
@@ -523,15 +661,26 @@ async def compare_prices():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Load the price comparison module (pandas + openai) ahead of the first request
+def prewarm_price_comparison():
+    try:
+        import price_comparison  # noqa: F401
+        print("Price comparison module pre-warmed.")
+    except Exception as e:
+        print(f"Price comparison pre-warm failed: {e}")
 
 
 # Upload CSV data at startup
 @app.on_event("startup")
 async def startup_event():
+    print("Ensuring tables exist...")
+    ensure_tables()
+    load_watches()
     print("Starting CSV upload...")
     upload_csv_data()
-    print("Ensuring Goals table exists...")
-    ensure_goals_table()
+    if prewarm_compare_prices:
+        # Runs in a worker thread so startup isn't held up by the imports
+        asyncio.get_running_loop().run_in_executor(None, prewarm_price_comparison)
 
 if __name__ == "__main__":
     import uvicorn
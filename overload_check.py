@@ -0,0 +1,172 @@
+"""Synthetic overload check for the admission controller.
+
+Drives main.app in-process with a throwaway SQLite database. The OpenAI
+call in /compare_prices is replaced with a blocking time.sleep of the same
+kind, so /compare_prices holds a threadpool thread just as it does in
+production. A flood of /compare_prices requests (each from its own client
+IP, so only the concurrency limits apply) runs alongside a steady stream of
+cheap /users/{user_id} requests.
+
+Each mode runs in a fresh interpreter, because main reads
+ADMISSION_CONTROL when it is imported. The check compares cheap-route
+latency with and without admission control, and fails if the p99 with it
+is over budget. It also checks that a request cancelled while queued for a
+global slot gives back its route-class slot.
+
+Usage:
+    python overload_check.py
+    python overload_check.py --flood 400 --p99-budget-ms 100
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SUMMARY_SECONDS = 0.5  # stands in for the OpenAI round-trip
+
+
+def p99(values):
+    return statistics.quantiles(values, n=100)[98] if len(values) > 1 else values[0]
+
+
+async def run(app, user_id, flood, cheap_requests):
+    import httpx
+
+    async def request(method, path, client_ip):
+        transport = httpx.ASGITransport(app=app, client=(client_ip, 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            response = await client.request(method, path)
+            return response.status_code, time.perf_counter() - start
+
+    flood_tasks = [
+        asyncio.create_task(request("POST", "/compare_prices", f"10.0.{i // 256}.{i % 256}"))
+        for i in range(flood)
+    ]
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    for _ in range(cheap_requests):
+        status, elapsed = await request("GET", f"/users/{user_id}", "192.168.0.1")
+        if status == 200:
+            latencies.append(elapsed)
+        await asyncio.sleep(0.01)
+
+    results = await asyncio.gather(*flood_tasks)
+    rejected = sum(1 for status, _ in results if status != 200)
+    return latencies, rejected
+
+
+async def check_cancelled_admit():
+    """Returns the slots still held after a request is cancelled while queued for a global slot."""
+    from admission import AdmissionController
+
+    controller = AdmissionController(global_limit=1)
+    admitted, _, _ = await controller.admit("cheap", "10.0.0.1")
+    assert admitted
+    queued = asyncio.create_task(controller.admit("expensive", "10.0.0.2"))
+    await asyncio.sleep(0.05)  # holds the expensive slot, waits for the global one
+    queued.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await queued
+    controller.release("cheap")
+
+    stats = controller.stats()
+    return stats["global"]["active"] + sum(c["active"] for c in stats["classes"].values())
+
+
+def child(flood, cheap_requests):
+    """Runs one mode against main.app and prints the results as JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(tmp, "overload.db")
+
+        # main and the handlers print a lot; keep stdout for the JSON result
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main
+            import price_comparison
+
+            def slow_summary(target_df, trader_joes_df):
+                time.sleep(SUMMARY_SECONDS)  # blocks its thread like the OpenAI call
+                return "<p>summary</p>"
+
+            price_comparison.generate_price_comparison_summary = slow_summary
+
+            main.ensure_tables()
+            conn = main.create_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO Users (name, email, dob, income) VALUES (%s, %s, %s, %s)",
+                ("Overload", "overload@example.com", "1990-04-01", 55000),
+            )
+            user_id = cursor.lastrowid
+            conn.commit()
+            conn.close()
+
+            latencies, rejected = asyncio.run(run(main.app, user_id, flood, cheap_requests))
+            stats = main.admission_controller.stats() if main.admission_enabled else None
+
+    print(json.dumps({"latencies": latencies, "rejected": rejected, "stats": stats}))
+
+
+def run_mode(admission, args):
+    env = dict(os.environ, ADMISSION_CONTROL="1" if admission else "0")
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child",
+         "--flood", str(args.flood), "--cheap-requests", str(args.cheap_requests)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit("Overload run failed.")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cheap-route latency under overload")
+    parser.add_argument("--flood", type=int, default=200)
+    parser.add_argument("--cheap-requests", type=int, default=100)
+    parser.add_argument("--p99-budget-ms", type=float, default=100)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.flood, args.cheap_requests)
+        return
+
+    leaked = asyncio.run(check_cancelled_admit())
+    if leaked:
+        print(f"FAIL: {leaked} slot(s) still held after a cancelled admission")
+        sys.exit(1)
+    print("cancelled admission releases its slots")
+
+    without = run_mode(False, args)
+    latencies = without["latencies"]
+    print(f"without admission control: cheap p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {p99(latencies) * 1000:.1f} ms")
+
+    with_admission = run_mode(True, args)
+    latencies = with_admission["latencies"]
+    cheap_p99_ms = p99(latencies) * 1000
+    print(f"with admission control:    cheap p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {cheap_p99_ms:.1f} ms, {with_admission['rejected']}/{args.flood} flood requests rejected")
+    print(f"stats: {with_admission['stats']}")
+
+    if len(latencies) < args.cheap_requests or cheap_p99_ms > args.p99_budget_ms:
+        print(f"FAIL: cheap route p99 over {args.p99_budget_ms:.0f} ms or cheap requests rejected")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Price comparison between Target and Trader Joe's.
+
+Kept out of main.py so pandas and openai are only imported when
+/compare_prices is used (or pre-warmed at startup), not on every worker start.
+"""
+import os
+from dotenv import load_dotenv
+from fastapi import HTTPException
+import openai
+import pandas as pd
+
+# Load environment variables
+load_dotenv()
+
+#openai key
+openai.api_key = os.getenv("OPENAI_API_KEY")
+
+# Function to read products from a CSV file using Pandas
+def read_products_from_csv(file_path: str) -> pd.DataFrame:
+    """Reads product data from a CSV file and returns it as a Pandas DataFrame."""
+    try:
+        # Load the CSV into a DataFrame
+        df = pd.read_csv(file_path)
+
+        # Clean the 'price' column by removing non-numeric characters and converting it to float
+        df['price'] = df['price'].replace({r'[^\d.]': ''}, regex=True)  # Keep only digits and decimal points
+        df['price'] = pd.to_numeric(df['price'], errors='coerce')  # Convert to float, invalid values become NaN
+
+        # Remove rows where price is NaN (invalid data)
+        df = df.dropna(subset=['price'])
+
+        return df[['product_name', 'price']]  # Return only the necessary columns
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"CSV file '{file_path}' not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Price comparison function using OpenAI
+def generate_price_comparison_summary(target_df: pd.DataFrame, trader_joes_df: pd.DataFrame) -> str:
+    # Convert DataFrames to a string format for OpenAI
+    target_products_str = target_df.to_dict(orient='records')
+    trader_joes_products_str = trader_joes_df.to_dict(orient='records')
+
+    prompt = f"""
+    You are a price comparison assistant. I will provide you with product prices from two stores, Target and Trader Joe's.
+
+    Please compare the prices of the following products between the two stores. You do not need to rely on exact product names but instead use your understanding to evaluate if two products are similar. For example, "Red Onion" and "Onion" can be considered the same. Use keywords, context, and common product categories to determine similarity. If two products are different but belong to the same category (e.g., onions, tomatoes, garlic, herbs), treat them as similar.
+
+    If a product is found in both stores, calculate the percentage price difference. If a product is only found in one store, try to find a similar product from the other store and treat it as part of the same category. If no equivalent product is found in the other store, ignore it in your comparison.
+
+    For the summary, display **5 example products** that are available in both stores, showing their price differences and the percentage difference between them. Each example should include the following:
+    - Product Name
+    - Target Price
+    - Trader Joe's Price
+    - Percentage Price Difference (rounded to 2 decimal places)
+
+    Ensure that the examples reflect a range of price differences:
+    1. One example where Target is more expensive.
+    2. One example where Trader Joe's is more expensive.
+    3. One example where the prices are equal.
+    4. The other examples should show diverse products with varied price differences.
+
+    Please also provide a general **overall summary** comparing the two stores:
+    - Which store generally has better prices (Target or Trader Joe's)?
+    - What is the approximate percentage difference in prices across all products compared (if applicable)?
+
+    Here is the data you should consider:
+
+    Target Products:
+    {target_products_str}
+
+    Trader Joe's Products:
+    {trader_joes_products_str}
+
+    Please provide the results in an HTML format. Use the following structure:
+
+    <h3>Example Products:</h3>
+    <ul>
+        <li><strong>Product Name:</strong> Product1 <br> <strong>Target Price:</strong> $5.89 <br> <strong>Trader Joe's Price:</strong> $2.29 <br> <strong>Percentage Price Difference:</strong> 61.16%</li>
+        <!-- Add other products here -->
+    </ul>
+
+    <h3>Overall Summary</h3>
+    <p>Trader Joe's generally has better prices as seen in the provided examples. The average savings when shopping at Trader Joe's compared to Target is approximately 33.05%.</p>
+
+    Please format the output using <strong>HTML tags</strong> to improve readability.
+
+    Dont include ```html or anything. Include a brief text in <p> in the beginning along the lines 'Let's have a look at the data we obtained this week'
+
+    Please provide a concise and professional summary, avoiding unnecessary details.
+    """
+    print('woop')
+    
+    
+    try:
+        response = openai.ChatCompletion.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": "You are a price comparison assistant."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        print('womp')
+        print(response['choices'][0]['message']['content'])  # Access the AI's response
+    except Exception as e:
+        print("API Call Failed:", str(e))
+
+    # Get the OpenAI response (summary)
+    summary = response['choices'][0]['message']['content'].strip()
+
+    print(summary)
+    return summary
@@ -0,0 +1,408 @@
+"""Storage backends for the API.
+
+The queries in main.py are written for mysql.connector (%s placeholders,
+cursor(dictionary=True)). MySQLBackend connects to the MySQL server from
+.env. SQLiteBackend opens an embedded database file and wraps sqlite3 so the
+same queries run unchanged. Pick the backend with DB_BACKEND=mysql|sqlite.
+
+Both backends create the same tables and indexes, listed in TABLES and
+INDEXES below.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+try:
+    import mysql.connector
+    import mysql.connector.pooling
+    Error = (mysql.connector.Error, sqlite3.Error)
+except ImportError:  # SQLite-only deployments don't need the MySQL driver
+    mysql = None
+    Error = sqlite3.Error
+
+
+# {pk} / {bigpk} are filled in with each backend's auto-increment primary key.
+# Indexes are created separately from INDEXES so existing tables get them too.
+TABLES = {
+    "Users": """
+        CREATE TABLE IF NOT EXISTS Users (
+            user_id {bigpk},
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            dob DATE,
+            income DECIMAL(12, 2),
+            budget DECIMAL(12, 2),
+            password VARCHAR(255)
+        )
+    """,
+    "Marketplace": """
+        CREATE TABLE IF NOT EXISTS Marketplace (
+            id {pk},
+            store_name VARCHAR(255) NOT NULL,
+            product_name VARCHAR(255) NOT NULL,
+            url TEXT,
+            price DECIMAL(10, 2) NOT NULL,
+            last_checked_at DATETIME
+        )
+    """,
+    "Goals": """
+        CREATE TABLE IF NOT EXISTS Goals (
+            goal_id {pk},
+            user_id BIGINT NOT NULL,
+            status VARCHAR(50) NOT NULL,
+            set_date DATE NOT NULL,
+            due_date DATE NOT NULL,
+            goal_type VARCHAR(255) NOT NULL,
+            current_amount FLOAT NOT NULL,
+            target_amount FLOAT NOT NULL
+        )
+    """,
+    "Expenses": """
+        CREATE TABLE IF NOT EXISTS Expenses (
+            expense_id {pk},
+            date DATE NOT NULL,
+            amount DECIMAL(10, 2) NOT NULL,
+            category VARCHAR(100),
+            user_id BIGINT NOT NULL
+        )
+    """,
+    "Watchlist": """
+        CREATE TABLE IF NOT EXISTS Watchlist (
+            watch_id {pk},
+            user_id BIGINT NOT NULL,
+            product_id INT NOT NULL,
+            target_price DECIMAL(10, 2) NOT NULL,
+            created_at DATETIME NOT NULL
+        )
+    """,
+    # Alerts is the per-user outbox that ingestion writes triggered alerts to
+    "Alerts": """
+        CREATE TABLE IF NOT EXISTS Alerts (
+            alert_id {pk},
+            user_id BIGINT NOT NULL,
+            watch_id INT NOT NULL,
+            product_id INT NOT NULL,
+            target_price DECIMAL(10, 2) NOT NULL,
+            old_price DECIMAL(10, 2) NOT NULL,
+            new_price DECIMAL(10, 2) NOT NULL,
+            created_at DATETIME NOT NULL
+        )
+    """,
+}
+
+# (index name, table, columns)
+INDEXES = [
+    ("idx_users_email", "Users", "email"),
+    ("idx_marketplace_product_store", "Marketplace", "product_name, store_name"),
+    ("idx_marketplace_store_price", "Marketplace", "store_name, price"),
+    ("idx_goals_user", "Goals", "user_id"),
+    ("idx_expenses_user_date", "Expenses", "user_id, date"),
+    ("idx_watchlist_user", "Watchlist", "user_id"),
+    ("idx_watchlist_product", "Watchlist", "product_id"),
+    ("idx_alerts_user", "Alerts", "user_id"),
+]
+
+# Rows per batched INSERT, so a statement stays well under MySQL's
+# max_allowed_packet (4 MB by default before MySQL 8.0)
+BATCH_SIZE = 5000
+
+
+# Seconds an ingestion waits for another process's ingestion to finish
+INGESTION_LOCK_TIMEOUT = 300
+
+
+def batches(rows, size=BATCH_SIZE):
+    """Yields rows in lists of at most size."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class _PooledConnection:
+    """Pooled connection that frees its slot in the pool on close()."""
+
+    def __init__(self, conn, slots):
+        self._conn = conn
+        self._slots = slots
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        try:
+            self._conn.close()  # returns the connection to the pool
+        finally:
+            self._slots.release()
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self, host, user, password, database, pool_size=8):
+        self.config = {"host": host, "user": user, "password": password, "database": database}
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # The pool raises instead of waiting when it is empty, so wait here
+        self._pool_slots = threading.BoundedSemaphore(pool_size)
+
+    def connect(self, pooled=False):
+        """Opens a new connection, or takes one from the pool if pooled is set.
+
+        Only use pooled connections where close() is guaranteed; a pooled
+        connection that is never closed is lost to the pool.
+        """
+        if pooled:
+            return self._pooled_connection()
+        conn = mysql.connector.connect(**self.config)
+        return conn if conn.is_connected() else None
+
+    def _pooled_connection(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name="econome", pool_size=self.pool_size, **self.config
+                )
+        self._pool_slots.acquire()
+        try:
+            return _PooledConnection(self._pool.get_connection(), self._pool_slots)
+        except Exception:
+            self._pool_slots.release()
+            raise
+
+    def create_tables(self, cursor):
+        for table, ddl in TABLES.items():
+            cursor.execute(ddl.format(
+                pk="INT AUTO_INCREMENT PRIMARY KEY",
+                bigpk="BIGINT AUTO_INCREMENT PRIMARY KEY",
+            ))
+
+        # MySQL has no CREATE INDEX IF NOT EXISTS. Look up which indexes exist
+        # so tables created before this release get them too.
+        cursor.execute("""
+            SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+        """)
+        existing = {(table.lower(), name.lower()) for table, name in cursor.fetchall()}
+        for name, table, columns in INDEXES:
+            if (table.lower(), name.lower()) not in existing:
+                cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+        # Tables created before the shared schema have INT user ids, which
+        # real user ids (e.g. 1731563859308) overflow
+        cursor.execute("""
+            SELECT table_name, data_type FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND column_name = 'user_id'
+            AND table_name IN ('Goals', 'Expenses', 'Watchlist', 'Alerts')
+        """)
+        for table, data_type in cursor.fetchall():
+            if data_type.lower() == "int":
+                cursor.execute(f"ALTER TABLE {table} MODIFY user_id BIGINT NOT NULL")
+
+    @contextmanager
+    def ingestion_lock(self, conn, timeout=INGESTION_LOCK_TIMEOUT):
+        """Runs one ingestion at a time across all processes using this database.
+
+        Commit inside the block. Every uvicorn worker ingests on startup; the
+        lock makes each one read the prices the previous one wrote, so a
+        price drop is only found, and alerted on, once.
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK('econome_ingestion', %s)", (timeout,))
+            if cursor.fetchone()[0] != 1:
+                raise mysql.connector.Error("Timed out waiting for the ingestion lock")
+            # End any open transaction so reads see what the last holder committed
+            conn.commit()
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('econome_ingestion')")
+            cursor.fetchone()
+            cursor.close()
+
+    def update_prices(self, cursor, rows):
+        """Applies (id, price, last_checked_at) rows to Marketplace in one UPDATE.
+
+        The rows go into a temporary table with batched INSERTs, so a
+        re-scrape costs a few round-trips instead of one per changed product.
+        Each id may appear only once.
+        """
+        cursor.execute("""
+            CREATE TEMPORARY TABLE price_updates (
+                id INT PRIMARY KEY,
+                price DECIMAL(10, 2) NOT NULL,
+                last_checked_at DATETIME
+            )
+        """)
+        try:
+            for batch in batches(rows):
+                cursor.executemany(
+                    "INSERT INTO price_updates (id, price, last_checked_at) VALUES (%s, %s, %s)", batch
+                )
+            cursor.execute("""
+                UPDATE Marketplace m JOIN price_updates u ON m.id = u.id
+                SET m.price = u.price, m.last_checked_at = u.last_checked_at
+            """)
+        finally:
+            cursor.execute("DROP TEMPORARY TABLE price_updates")
+
+
+# sqlite3 stores these as text/real; register adapters instead of relying
+# on the deprecated defaults
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(Decimal, float)
+
+SQLITE_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",  # safe with WAL, avoids an fsync per commit
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",  # 20 MB page cache
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+]
+
+
+@lru_cache(maxsize=256)
+def _to_qmark(query: str) -> str:
+    return query.replace("%s", "?")
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """sqlite3 cursor that accepts mysql.connector-style %s queries."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(_to_qmark(query), params)
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(_to_qmark(query), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection with the parts of the mysql.connector API main.py uses."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False):
+        cursor = self._conn.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return SQLiteCursor(cursor)
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._wal_enabled = False
+
+    def connect(self, pooled=False):
+        # Opening an SQLite connection is cheap, so there is no pool
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        if not self._wal_enabled:
+            # journal_mode is stored in the database file, so once is enough
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._wal_enabled = True
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return SQLiteConnection(conn)
+
+    def create_tables(self, cursor):
+        for table, ddl in TABLES.items():
+            cursor.execute(ddl.format(
+                pk="INTEGER PRIMARY KEY AUTOINCREMENT",
+                bigpk="INTEGER PRIMARY KEY AUTOINCREMENT",
+            ))
+        for name, table, columns in INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+    @contextmanager
+    def ingestion_lock(self, conn, timeout=INGESTION_LOCK_TIMEOUT):
+        """Runs one ingestion at a time across all processes using this database.
+
+        BEGIN IMMEDIATE takes the database's write lock before anything is
+        read, and holds it until the block commits.
+        """
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA busy_timeout")
+        busy_timeout = cursor.fetchone()[0]
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+            cursor.execute("BEGIN IMMEDIATE")
+            yield
+        finally:
+            cursor.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+            cursor.close()
+
+    def update_prices(self, cursor, rows):
+        """Applies (id, price, last_checked_at) rows to Marketplace.
+
+        There are no network round-trips in-process, so executemany is as
+        fast as a staging table here.
+        """
+        cursor.executemany(
+            "UPDATE Marketplace SET price = %s, last_checked_at = %s WHERE id = %s",
+            [(price, checked_at, product_id) for product_id, price, checked_at in rows],
+        )
+
+
+def get_backend():
+    """Returns the backend selected by DB_BACKEND (mysql by default)."""
+    backend = os.getenv("DB_BACKEND", "mysql").lower()
+    if backend == "sqlite":
+        return SQLiteBackend(os.getenv("SQLITE_PATH", "econome.db"))
+    if backend == "mysql":
+        if mysql is None:
+            raise RuntimeError("DB_BACKEND=mysql requires mysql-connector-python")
+        return MySQLBackend(
+            host=os.getenv("db_host"),
+            user=os.getenv("db_user"),
+            password=os.getenv("db_pass"),
+            database=os.getenv("db_name"),
+            pool_size=int(os.getenv("db_pool_size", 8)),
+        )
+    raise RuntimeError(f"Unknown DB_BACKEND '{backend}', expected 'mysql' or 'sqlite'")